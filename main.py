@@ -1,10 +1,13 @@
 import asyncio
 import datetime
 import os
-import traceback
+import random
+from email.utils import formatdate
 from pathlib import Path
 from typing import Tuple
+from uuid import uuid4
 
+import aiofiles
 import aiohttp
 
 from astrbot.api import AstrBotConfig, logger
@@ -15,6 +18,11 @@ from astrbot.core.message.message_event_result import MessageChain
 # 保存新闻的目录
 SAVED_NEWS_DIR = Path("data", "plugin_data", "astrbot_plugin_daily_60s_news", "news")
 SAVED_NEWS_DIR.mkdir(parents=True, exist_ok=True)
+# 请求默认携带的请求头
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "astrbot-daily-news/0.0.3",
+}
 
 
 def _file_exists(path: str) -> bool:
@@ -24,6 +32,54 @@ def _file_exists(path: str) -> bool:
     return os.path.exists(path)
 
 
+class NewsFetchError(Exception):
+    """获取新闻失败，重试无意义"""
+
+
+class NewsRetryable(NewsFetchError):
+    """获取新闻失败，可稍后重试"""
+
+
+# 下载时可重试的异常类型
+RETRYABLE_ERRORS = (
+    NewsRetryable,
+    asyncio.TimeoutError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+)
+
+
+def _check_response(response: aiohttp.ClientResponse, desc: str):
+    """
+    检查响应状态码：5xx/429 视为可重试，其余非 200 直接失败
+    """
+    try:
+        response.raise_for_status()
+    except aiohttp.ClientResponseError as e:
+        if e.status >= 500 or e.status == 429:
+            raise NewsRetryable(f"{desc}: HTTP {e.status}") from e
+        raise NewsFetchError(f"{desc}: HTTP {e.status}") from e
+    if response.status != 200:
+        raise NewsFetchError(f"{desc}: HTTP {response.status}")
+
+
+async def _stream_to_file(response: aiohttp.ClientResponse, path: str):
+    """
+    将响应内容分块写入临时文件，完成后原子替换为目标文件
+    """
+    # 每次下载使用独立的临时文件，并按 umask 保留常规文件权限
+    tmp_path = f"{path}.{uuid4().hex}.tmp"
+    try:
+        async with aiofiles.open(tmp_path, "xb") as f:
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                await f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 @register(
     "每日60s读懂世界",
     "eaton",
@@ -43,6 +99,11 @@ class Daily60sNewsPlugin(Star):
         self.news_path = SAVED_NEWS_DIR
         self.groups = self.config.groups
         self.push_time = self.config.push_time
+        try:
+            push_at = datetime.datetime.strptime(self.push_time, "%H:%M")
+        except ValueError as e:
+            raise ValueError(f"推送时间格式错误，应为 HH:MM: {self.push_time}") from e
+        self._push_h, self._push_m = push_at.hour, push_at.minute
         if self.news_type == "vikiboss_api":
             self.api = self.config.vikiboss_api
         elif self.news_type == "indirect":
@@ -51,7 +112,33 @@ class Daily60sNewsPlugin(Star):
             self.date_key = self.config.date_key
         elif self.news_type == "direct":
             self.img_url = self.config.direct
-        logger.info(f"插件配置: {self.config}")
+        self.is_debug = config.get("is_debug", False)
+        if self.is_debug:
+            logger.debug("插件配置: %s", self.config)
+
+        # 按获取渠道选择图片链接解析方式
+        resolvers = {
+            "vikiboss_api": self._resolve_viki_url,
+            "indirect": self._resolve_indirect_url,
+            "direct": self._resolve_direct_url,
+        }
+        if self.news_type not in resolvers:
+            raise ValueError(f"不支持的新闻获取渠道: {self.news_type}")
+        self._resolve_image_url = resolvers[self.news_type]
+
+        # 共享的 HTTP 会话，首次使用时创建
+        self._session: aiohttp.ClientSession | None = None
+        # 新闻文件已就绪的日期，命中时无需再检查磁盘
+        self._news_ready_date: datetime.date | None = None
+        # 今日新闻文件路径缓存: (日期, (文件绝对路径, 文件名))
+        self._file_path_cache: tuple[datetime.date, Tuple[str, str]] | None = None
+        # 按日期合并并发下载，避免同一文件被重复下载
+        self._download_locks: dict[str, asyncio.Lock] = {}
+
+        # 插件卸载时通知定时任务立即退出
+        self._stop = asyncio.Event()
+        # 最近一次定时推送的日期
+        self._last_push_date: datetime.date | None = None
 
         # 启动定时任务
         self._monitoring_task = asyncio.create_task(self._daily_task())
@@ -105,8 +192,18 @@ class Daily60sNewsPlugin(Star):
         """
         手动向目标群组推送今日60s新闻（仅管理员）
         """
-        await self._send_daily_news_to_groups()
-        yield event.plain_result(f"{event.get_sender_name()}:已成功向群组推送新闻")
+        ok, failed = await self._send_daily_news_to_groups()
+        if not ok:
+            yield event.plain_result(
+                f"{event.get_sender_name()}:获取今日新闻失败，未向群组推送"
+            )
+        elif failed:
+            yield event.plain_result(
+                f"{event.get_sender_name()}:部分群组推送失败({len(failed)}个): "
+                + ", ".join(failed)
+            )
+        else:
+            yield event.plain_result(f"{event.get_sender_name()}:已成功向群组推送新闻")
 
     @filter.permission_type(filter.PermissionType.ADMIN)
     @mnews.command("update_news")
@@ -121,24 +218,43 @@ class Daily60sNewsPlugin(Star):
 
     async def terminate(self):
         """插件卸载时调用"""
+        self._stop.set()
         if self._monitoring_task:
             self._monitoring_task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
         logger.info("每日60s新闻插件: 定时任务已停止")
 
     async def _update_news_files(self):
         logger.info("开始强制更新新闻文件...")
-        image_path, _ = self._get_news_file_path()
-        await self._download_news(path=image_path)
-
-    def _get_news_file_path(self) -> Tuple[str, str]:
+        self._news_ready_date = None
+        date = datetime.date.today()
+        image_path, _ = self._get_news_file_path(date)
+        lock = self._download_locks.setdefault(date.isoformat(), asyncio.Lock())
+        async with lock:
+            headers = None
+            if _file_exists(image_path):
+                # 本地已有文件时让服务端在未更新时返回 304
+                mtime = os.path.getmtime(image_path)
+                headers = {"If-Modified-Since": formatdate(mtime, usegmt=True)}
+            await self._download_news(path=image_path, headers=headers)
+
+    def _get_news_file_path(
+        self, today: datetime.date | None = None
+    ) -> Tuple[str, str]:
         """
         获取今日新闻文件的绝对路径和文件名
+        :param today: 指定日期，默认为今天
         :return: (文件绝对路径, 文件名)
         """
-        current_date = datetime.datetime.now().strftime("%Y%m%d")
-        name = f"{current_date}.jpeg"
-        path = os.path.join(self.news_path, name)
-        logger.info(f"mnews path: {path}")
+        today = today or datetime.date.today()
+        if self._file_path_cache and self._file_path_cache[0] == today:
+            return self._file_path_cache[1]
+        name = f"{today.strftime('%Y%m%d')}.jpeg"
+        path = str(self.news_path / name)
+        if self.is_debug:
+            logger.debug("mnews path: %s", path)
+        self._file_path_cache = (today, (path, name))
         return path, name
 
     # async def _get_text_news(self) -> Tuple[str, bool]:
@@ -159,124 +275,177 @@ class Daily60sNewsPlugin(Star):
         获取图片新闻路径，若本地无则下载
         :return: (图片路径, 是否成功)
         """
-        path, _ = self._get_news_file_path()
-        if _file_exists(path):
+        date = datetime.date.today()
+        today = date.isoformat()
+        # 使用同一日期计算路径，避免跨零点时把昨天的文件标记为今天
+        path, _ = self._get_news_file_path(date)
+        if self._news_ready_date == date:
             return path, True
-        else:
-            return await self._download_news(path)
 
-    async def _download_news(self, path: str) -> tuple[str, bool] | None:
+        if _file_exists(path):
+            result = path, True
+        else:
+            lock = self._download_locks.setdefault(today, asyncio.Lock())
+            async with lock:
+                if _file_exists(path):
+                    result = path, True
+                else:
+                    result = await self._download_news(path)
+        if result and result[1]:
+            self._news_ready_date = date
+        return result
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的 HTTP 会话，不存在或已关闭时重新创建
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=30, connect=3, sock_read=10),
+                connector=aiohttp.TCPConnector(
+                    limit=10, ttl_dns_cache=300, keepalive_timeout=75
+                ),
+            )
+        return self._session
+
+    async def _download_news(
+        self, path: str, headers: dict[str, str] | None = None
+    ) -> tuple[str, bool] | None:
         """
         下载今日新闻（图片），失败自动重试
         :param path: 保存路径
+        :param headers: 下载图片时附加的请求头
         :return: (内容或路径, 是否成功)
         """
         retries = 3
-        timeout = 5
-        date = datetime.datetime.now().strftime("%Y-%m-%d")
 
         for attempt in range(retries):
             try:
-                if self.news_type == "vikiboss_api":
-                    url = f"https://60s-api.viki.moe/v2/60s?date={date}&encoding=image-proxy"
-                    logger.info(f"开始下载新闻文件:{url}...")
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, timeout=timeout) as response:
-                            if response.status == 200:
-                                content = await response.read()
-                                with open(path, "wb") as f:
-                                    f.write(content)
-                                    return path, True
-                            else:
-                                raise Exception(f"API返回错误代码: {response.status}")
-                elif self.news_type == "indirect":
-                    url = self.api
-                    logger.info(f"开始获取新闻数据:{url}...")
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, timeout=timeout) as response:
-                            if response.status == 200:
-                                # 解析JSON响应
-                                data = await response.json()
-                                if data.get("code") == 200:
-                                    api_date = data.get("datatime")
-                                    today = datetime.datetime.now().strftime("%Y-%m-%d")
-                                    if today != api_date:
-                                        # 回退viki_boss
-                                        url = f"https://60s-api.viki.moe/v2/60s?date={date}&encoding=image-proxy"
-                                        logger.info(f"开始下载新闻文件:{url}...")
-                                        async with aiohttp.ClientSession() as session:
-                                            async with session.get(url, timeout=timeout) as response:
-                                                if response.status == 200:
-                                                    content = await response.read()
-                                                    with open(path, "wb") as f:
-                                                        f.write(content)
-                                                        return path, True
-                                                else:
-                                                    raise Exception(f"API返回错误代码: {response.status}")
-
-                                    image_url = data.get("imageUrl")
-                                    if not image_url:
-                                        raise Exception("响应中未找到imageUrl字段")
-
-                                    # 下载图片
-                                    logger.info(f"开始下载图片:{image_url}...")
-                                    async with session.get(image_url, timeout=timeout) as img_response:
-                                        if img_response.status == 200:
-                                            img_content = await img_response.read()
-                                            with open(path, "wb") as f:
-                                                f.write(img_content)
-                                            return path, True
-                                        else:
-                                            raise Exception(f"图片下载失败: HTTP {img_response.status}")
-                                else:
-                                    raise Exception(f"API返回错误: {data.get('msg', '未知错误')}")
-                            else:
-                                raise Exception(f"API请求失败: HTTP {response.status}")
-                elif self.news_type == "direct":
-                    url = self.img_url
-                    logger.info(f"开始下载新闻文件:{url}...")
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(url, timeout=timeout) as response:
-                            if response.status == 200:
-                                content = await response.read()
-                                with open(path, "wb") as f:
-                                    f.write(content)
-                                    return path, True
-                            else:
-                                raise Exception(f"API返回错误代码: {response.status}")
-
-            except Exception as e:
+                session = await self._ensure_session()
+                url = await self._resolve_image_url(session)
+                if self.is_debug:
+                    logger.debug("开始下载新闻文件:%s...", url)
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        # 图片未更新，沿用本地文件
+                        return path, True
+                    _check_response(response, "图片下载失败")
+                    await _stream_to_file(response, path)
+                    return path, True
+
+            except RETRYABLE_ERRORS as e:
+                if attempt == retries - 1:
+                    return self._download_failed(e)
                 logger.error(
                     f"[mnews] 请求失败，正在重试 {attempt + 1}/{retries} 次: {e}"
                 )
-                if attempt == retries - 1:
-                    logger.error(f"[mnews] 请求新闻接口失败: {e}")
-                    content = f"接口报错，请联系管理员:{e}"
-                    return content, False
-                await asyncio.sleep(1)
+                # 指数退避并加入随机抖动，避免重试集中在同一时间窗口
+                await asyncio.sleep(min(2**attempt, 10) + random.uniform(0, 0.5))
+            except Exception as e:
+                return self._download_failed(e)
         return None
 
-    async def _send_daily_news_to_groups(self):
+    def _download_failed(self, e: Exception) -> tuple[str, bool]:
+        """
+        记录下载失败并返回给用户的错误提示
+        :return: (错误提示, False)
+        """
+        logger.error(f"[mnews] 请求新闻接口失败: {e}")
+        return f"接口报错，请联系管理员:{e}", False
+
+    async def _resolve_viki_url(self, session: aiohttp.ClientSession) -> str:
+        """
+        vikiboss 接口直接返回今日图片
+        :return: 图片链接
+        """
+        date = datetime.datetime.now().strftime("%Y-%m-%d")
+        return f"https://60s-api.viki.moe/v2/60s?date={date}&encoding=image-proxy"
+
+    async def _resolve_indirect_url(self, session: aiohttp.ClientSession) -> str:
+        """
+        请求间接接口获取图片链接，接口数据不是今日时回退到 vikiboss
+        :return: 图片链接
+        """
+        url = self.api
+        if self.is_debug:
+            logger.debug("开始获取新闻数据:%s...", url)
+        async with session.get(url) as response:
+            _check_response(response, "API请求失败")
+            # 解析JSON响应
+            data = await response.json()
+        if data.get("code") != 200:
+            raise NewsFetchError(f"API返回错误: {data.get('msg', '未知错误')}")
+
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        if today != data.get("datatime"):
+            # 回退viki_boss
+            return await self._resolve_viki_url(session)
+
+        image_url = data.get("imageUrl")
+        if not image_url:
+            raise NewsFetchError("响应中未找到imageUrl字段")
+        return image_url
+
+    async def _resolve_direct_url(self, session: aiohttp.ClientSession) -> str:
+        """
+        direct 接口本身即为图片链接
+        :return: 图片链接
+        """
+        return self.img_url
+
+    async def _send_daily_news_to_groups(self) -> Tuple[bool, list[str]]:
         """
         推送新闻到所有目标群组
+        :return: (是否获取到新闻, 推送失败的群组列表)
         """
-        for target in self.config.groups:
-            try:
+        news_path, ok = await self._get_image_news()
+        if not ok:
+            logger.error(f"[每日新闻] 获取新闻失败，取消推送: {news_path}")
+            return False, []
+        logger.info(f"[每日新闻] 推送图片新闻: {news_path}")
+
+        semaphore = asyncio.Semaphore(5)
 
-                news_path, _ = await self._get_image_news()
+        async def _send_one(target: str):
+            async with semaphore:
+                # 部分适配器会修改消息链，每个群组单独构建
                 message_chain = (
                     MessageChain().message("每日新闻播报：").file_image(news_path)
                 )
-                logger.info(f"[每日新闻] 推送图片新闻: {news_path}")
                 await self.context.send_message(target, message_chain)
-                logger.info(f"[每日新闻] 已向{target}推送定时新闻。")
-                await asyncio.sleep(2)  # 防止推送过快
-            except Exception as e:
-                error_message = str(e) if str(e) else "未知错误"
-                logger.error(f"[每日新闻] 推送新闻失败: {error_message}")
-                # 可选：记录堆栈跟踪信息
-                logger.exception("详细错误信息：")
-                await asyncio.sleep(2)  # 防止推送过快
+                logger.info("[每日新闻] 已向%s推送定时新闻。", target)
+
+        targets = list(self.config.groups)
+        results = await asyncio.gather(
+            *(_send_one(target) for target in targets), return_exceptions=True
+        )
+        failed = []
+        for target, result in zip(targets, results):
+            if isinstance(result, Exception):
+                failed.append(target)
+                error_message = str(result) if str(result) else "未知错误"
+                logger.error(
+                    f"[每日新闻] 向{target}推送新闻失败: {error_message}",
+                    exc_info=result,
+                )
+        return True, failed
+
+    def _next_push_datetime(self, now: datetime.datetime) -> datetime.datetime:
+        """
+        计算下一次推送的时间点
+        :param now: 当前时间
+        :return: 下次推送时间
+        """
+        next_push = now.replace(
+            hour=self._push_h, minute=self._push_m, second=0, microsecond=0
+        )
+        if next_push <= now:
+            next_push += datetime.timedelta(days=1)
+        if next_push.date() == self._last_push_date:
+            # 提前唤醒或时钟回拨时，同一天不重复推送
+            next_push += datetime.timedelta(days=1)
+        return next_push
 
     def _calculate_sleep_time(self) -> float:
         """
@@ -284,11 +453,7 @@ class Daily60sNewsPlugin(Star):
         :return: 距离下次推送的秒数
         """
         now = datetime.datetime.now()
-        hour, minute = map(int, self.push_time.split(":"))
-        next_push = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if next_push <= now:
-            next_push += datetime.timedelta(days=1)
-        return (next_push - now).total_seconds()
+        return max((self._next_push_datetime(now) - now).total_seconds(), 0)
 
     async def _delete_expired_news_files(self):
         """
@@ -297,29 +462,65 @@ class Daily60sNewsPlugin(Star):
         save_days = self.config.save_days
         if save_days <= 0:
             raise ValueError("保存天数不能小于0")
-        for filename in os.listdir(self.news_path):
-            try:
-                file_date = datetime.datetime.strptime(filename[:8], "%Y%m%d").date()
-                if (datetime.date.today() - file_date).days >= save_days:
-                    file_path = os.path.join(self.news_path, filename)
-                    os.remove(file_path)
-            except Exception:
-                continue
+        self._news_ready_date = None
+        today = datetime.date.today().isoformat()
+        for date in [d for d in self._download_locks if d != today]:
+            if not self._download_locks[date].locked():
+                del self._download_locks[date]
+        # 截止日期只计算一次，文件名日期不晚于此即视为过期
+        cutoff = int(
+            (datetime.date.today() - datetime.timedelta(days=save_days)).strftime(
+                "%Y%m%d"
+            )
+        )
+        await asyncio.to_thread(self._prune_sync, cutoff)
+
+    def _prune_sync(self, cutoff: int):
+        """
+        同步删除文件名日期不晚于 cutoff 的新闻文件，在线程中执行
+        :param cutoff: YYYYMMDD 形式的整数截止日期
+        """
+        with os.scandir(self.news_path) as entries:
+            for entry in entries:
+                date_str = entry.name[:8]
+                if not (
+                    len(date_str) == 8 and date_str.isascii() and date_str.isdigit()
+                ):
+                    continue
+                if int(date_str) <= cutoff:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
 
     async def _daily_task(self):
         """
         定时任务主循环，定时推送新闻
         """
-        while True:
+        while not self._stop.is_set():
             try:
-                sleep_time = self._calculate_sleep_time()
-                logger.info(f"[每日新闻] 下次推送将在 {sleep_time / 3600:.2f} 小时后")
-                await asyncio.sleep(sleep_time)
+                now = datetime.datetime.now()
+                next_push = self._next_push_datetime(now)
+                delay = max((next_push - now).total_seconds(), 0)
+                logger.info(f"[每日新闻] 下次推送将在 {delay / 3600:.2f} 小时后")
+                if await self._wait_stop(delay):
+                    break
+                self._last_push_date = next_push.date()
                 await self._update_news_files()
                 await self._delete_expired_news_files()
                 await self._send_daily_news_to_groups()
-                await asyncio.sleep(60)  # 避免重复推送
-            except Exception as e:
-                logger.error(f"[每日新闻] 定时任务出错: {e}")
-                traceback.print_exc()
-                await asyncio.sleep(300)
+            except Exception:
+                logger.exception("[每日新闻] 定时任务出错")
+                if await self._wait_stop(300):
+                    break
+
+    async def _wait_stop(self, timeout: float) -> bool:
+        """
+        等待停止信号或超时
+        :return: 是否收到停止信号
+        """
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False